@@ -1,20 +1,62 @@
 import multiprocessing as mp
+import multiprocessing.managers
+import os
+import pickle
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, TypeAlias, Union
+from typing import IO, Any, Callable, Dict, Optional, Tuple, TypeAlias, Union
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 ConfigObject: TypeAlias = Union[Dict, str]
 
+_parsed_files: Dict[str, Tuple[int, int, bytes]] = {}
+
+
+def _load_cached(file: Union[Path, str], parse: Callable[[IO[bytes]], Any]) -> Any:
+    """Parse a config file, reusing the previous result while it is unchanged.
+
+    Results are keyed on the file's mtime and size and kept pickled, so every
+    call returns a fresh copy that the caller is free to mutate.
+    """
+    path = os.path.abspath(file)
+    st = os.stat(path)
+    cached = _parsed_files.get(path)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return pickle.loads(cached[2])
+    with open(path, "rb") as f:
+        data = parse(f)
+    _parsed_files[path] = (
+        st.st_mtime_ns,
+        st.st_size,
+        pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+    )
+    return data
+
+
+def _parse_json(f: IO[bytes]) -> Any:
+    return _json_loads(f.read())
+
 
-@dataclass
+def _parse_yaml(f: IO[bytes]) -> Any:
+    # Imported here so PyYAML is only needed by callers that load YAML.
+    import yaml
+
+    return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+@dataclass(frozen=True, slots=True)
 class MongoConfig:
+    database_name: str
     host: str = "localhost"
     port: int = 27017
-    database_name: str
     collection: Optional[str] = None
     username: Optional[str] = None
     password: Optional[str] = None
-    authentication_db: Optional = None
+    authentication_db: Optional[str] = None
 
 
 class Configuration(mp.managers.BaseManager):
@@ -23,8 +65,8 @@ class Configuration(mp.managers.BaseManager):
     def parse_cli_args(self, args) -> None:
         ...
 
-    def load_json(self, file: Union[Path, str]):
-        ...
+    def load_json(self, file: Union[Path, str]) -> Dict:
+        return _load_cached(file, _parse_json)
 
-    def load_yaml(self, file: Union[Path, str]):
-        ...
+    def load_yaml(self, file: Union[Path, str]) -> Dict:
+        return _load_cached(file, _parse_yaml)
@@ -3,6 +3,7 @@ import configparser
 import json
 import logging
 import multiprocessing as mp
+import multiprocessing.managers
 import sys
 from functools import wraps
 from typing import (Any, Callable, Dict, Iterable, List, Optional, ParamSpec,
@@ -45,10 +46,12 @@ class SharedLogger(mp.managers.SyncManager):
 
         @wraps(init)
         def wrapper(*args, **kwargs) -> Any:
-            logger = self.logging.getLogger()
-            logger.addHandler(
-                self.logging.handlers.QueueListener(self._queue, *self._handlers)
+            listener = self.logging.handlers.QueueListener(
+                self._logging_queue,
+                *self._handler_factory(""),
+                respect_handler_level=True,
             )
+            listener.start()
             if init is not None:
                 init(*args, **kwargs)
 
@@ -63,7 +66,14 @@ class SharedLogger(mp.managers.SyncManager):
 
     def getLogger(self, name: str) -> logging.Logger:
         logger = self.logging.getLogger(name)
-        logger.addHandler(self.logging.handlers.QueueHandler(self._queue))
+        for handler in logger.handlers:
+            if (
+                isinstance(handler, self.logging.handlers.QueueHandler)
+                and handler.queue is self._logging_queue
+            ):
+                break
+        else:
+            logger.addHandler(self.logging.handlers.QueueHandler(self._logging_queue))
         return logger
 
     @classmethod
@@ -76,9 +86,21 @@ def parse_options(args: List[str]) -> None:
     ...
 
 
+# Imported once by the forkserver so that workers inherit them already loaded.
+# Only modules that are safe to import in the parent process belong here.
+FORKSERVER_PRELOAD = [
+    "configuration",
+    "logging.config",
+    "logging.handlers",
+    "pymongo",
+    "rich",
+    "yaml",
+]
+
+
 def setup_forkserver() -> mp.context.ForkServerContext:
     ctx = mp.get_context(method="forkserver")
-    ctx.set_forkserver_preload("configuration")
+    ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
     return ctx
 
 
@@ -99,7 +121,7 @@ if __name__ == "__main__":
     options = parse_options(sys.argv[1:])
 
     mp_ctx = setup_forkserver()
-    resources, shared_memory = get_managers()
+    resources, shared_memory = get_managers(mp_ctx)
 
     setup_logging(manager=resources)
-    pool = mp.pool.Pool(initializer=setup_logging, initargs=(resources))
+    pool = mp_ctx.Pool(initializer=setup_logging, initargs=(resources,))
@@ -1,18 +1,22 @@
+import collections
 import logging
 import multiprocessing as mp
 import threading
 import time
-from logging.handlers import (QueueHandler, QueueListener,
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import (MemoryHandler, QueueHandler, QueueListener,
                               TimedRotatingFileHandler)
 from pathlib import Path
-from typing import (Any, Callable, List, Literal, Optional, Tuple, TypeAlias,
-                    TypeVar, Union)
+from typing import (Any, Callable, Dict, List, Literal, Optional, Tuple,
+                    TypeAlias, TypeVar, Union)
 
 import rich
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.errors import (BulkWriteError, PyMongoError,
+                            ServerSelectionTimeoutError)
 
 from .configuration import MongoConfig
 
@@ -41,10 +45,13 @@ def _filter_loglevels_inverse(
     loglevel: LogLevel,
 ) -> Callable[[logging.LogRecord], bool]:
     """Logging filter factory"""
-    level = getattr(logging, loglevel)
+    if isinstance(loglevel, str):
+        level = getattr(logging, loglevel.upper())
+    else:
+        level = loglevel
 
-    def filter(record: logging.LogRecord) -> bool:
-        return record.level <= level
+    def filter(record: logging.LogRecord, _level: int = level) -> bool:
+        return record.levelno <= _level
 
     return filter
 
@@ -54,9 +61,7 @@ class TimedRotatingFileHandlerWithHeader(TimedRotatingFileHandler):
 
     def __init__(self, filename: str, *args, **kwargs) -> None:
         self.header = kwargs.pop("header", None)
-        path = Path(filename)
-        if not path.parent.exists():
-            path.parent.mkdir(parents=True)
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
         super().__init__(filename, *args, **kwargs)
 
     def _open(self):
@@ -67,61 +72,175 @@ class TimedRotatingFileHandlerWithHeader(TimedRotatingFileHandler):
         return stream
 
 
+class PeriodicMemoryHandler(MemoryHandler):
+    """Buffer records for a target handler and flush them in batches.
+
+    The buffer is flushed when it reaches ``capacity``, when a record of at
+    least ``flushLevel`` arrives, or every ``flush_interval`` seconds from a
+    background thread.  Wrapping a ``TimedRotatingFileHandlerWithHeader`` in
+    this handler groups its writes into bursts under a single lock acquisition;
+    the target still handles (and checks for rollover) one record at a time.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 512,
+        flushLevel: LogLevel = logging.ERROR,
+        target: Optional[logging.Handler] = None,
+        flushOnClose: bool = True,
+        flush_interval: float = 1.0,
+    ) -> None:
+        if isinstance(flushLevel, str):
+            flushLevel = getattr(logging, flushLevel.upper())
+        super().__init__(capacity, flushLevel, target, flushOnClose)
+        self._flush_interval = flush_interval
+        self._stop_flushing = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        # Never block on the handler lock: logging.shutdown() holds it while
+        # calling close(), which joins this thread.  A busy handler just
+        # skips this tick.
+        while not self._stop_flushing.wait(self._flush_interval):
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.flush()
+                finally:
+                    self.lock.release()
+
+    def close(self) -> None:
+        self._stop_flushing.set()
+        self._flusher.join()
+        super().close()
+
+
+class BatchEmitError(Exception):
+    """Raised by ``emit_many`` when only part of a batch could be written."""
+
+    def __init__(self, records: List[logging.LogRecord]) -> None:
+        super().__init__(f"{len(records)} record(s) could not be emitted")
+        self.records = records
+
+
 class BatchableLogHandler(logging.Handler):
-    """Base class for a handler that can emit LogRecords in batches."""
+    """Base class for a handler that can emit LogRecords in batches.
+
+    ``flush`` hands the buffer to ``emit_many`` in chunks of at most
+    ``max_batch_size`` records.  With ``max_buffered`` set, the buffer holds at
+    most that many records and the oldest are discarded when it is full.
+
+    Records from a failed batch are put back at the front of the buffer and
+    retried on the next flush, at most ``max_retries`` times each, after which
+    they are dropped.  ``emit_many`` can raise ``BatchEmitError`` to retry only
+    the records that were not written.
+    """
 
     def __init__(
         self,
         level: LogLevel = logging.NOTSET,
         buffer_size: int = -1,
         buffer_timeout: float = -1,
+        max_retries: int = 3,
+        max_batch_size: int = -1,
+        max_buffered: Optional[int] = None,
     ) -> None:
         super().__init__(level)
-        self._buffer = []
+        self._buffer = collections.deque(maxlen=max_buffered)
         self._buffer_size = buffer_size
-        self._buffer_lock = threading.RLock()
+        self._max_batch_size = max_batch_size
+        self._buffer_lock = threading.Lock()
         self._buffer_timeout = buffer_timeout
+        self.max_retries = max_retries
+        # Per-handler, since the same record may fail in several handlers.
+        self._attempts = weakref.WeakKeyDictionary()
         self._last_record = None
-        self._last_emitted = None
+        self._last_emitted = time.time()
 
     def emit_one(self, record: logging.LogRecord) -> None:
-        self._last_emitted = time.time()
         super().emit(record)
 
     def emit_many(self, records: List[logging.LogRecord]) -> None:
-        self._last_emitted = time.time()
+        failed, error = [], None
         for record in records:
-            self.emit_one(record)
+            try:
+                self.emit_one(record)
+            except Exception as exc:
+                failed.append(record)
+                error = exc
+        if failed:
+            raise BatchEmitError(failed) from error
 
     def emit(self, record: logging.LogRecord) -> None:
-        with self._buffer_lock:
-            self._last_record = record
-            self._buffer.append(self.format(record))
-
-        if (
-            len(self._buffer) > self._buffer_size
-            and time.time() - self._last_emitted >= self._buffer_timeout
-        ):
+        # Formatting is deferred to emit_many/emit_one so the calling thread
+        # only pays for the append.
+        self._last_record = record
+        self._buffer.append(record)
+        if self._should_flush(record):
             self.flush()
 
+    def _should_flush(self, record: logging.LogRecord) -> bool:
+        """Whether the buffer is full or ``buffer_timeout`` has elapsed.
+
+        Elapsed time is measured with the records' own ``created`` timestamps
+        rather than by reading the clock again.  With neither a buffer size nor
+        a timeout configured, every record is flushed as it arrives.
+        """
+        if self._buffer_size <= 0 and self._buffer_timeout <= 0:
+            return True
+        if self._buffer_size > 0 and len(self._buffer) >= self._buffer_size:
+            return True
+        return (
+            self._buffer_timeout > 0
+            and record.created - self._last_emitted >= self._buffer_timeout
+        )
+
     def flush(self) -> None:
-        if self._buffer:
-            with self._buffer_lock:
+        # Producers append without locking; draining with popleft() only takes
+        # what was buffered when the flush started. The lock just keeps two
+        # flushes from racing for the same records.
+        with self._buffer_lock:
+            popleft = self._buffer.popleft
+            pending = len(self._buffer)
+            while pending:
+                n = pending
+                if 0 < self._max_batch_size < n:
+                    n = self._max_batch_size
+                records = [popleft() for _ in range(n)]
+                pending -= n
                 try:
-                    self.emit_many(self._buffer)
-                    self.clear()
-                except Exception:
+                    self.emit_many(records)
+                    self._last_emitted = records[-1].created
+                except Exception as exc:
+                    failed = exc.records if isinstance(exc, BatchEmitError) else records
+                    self._requeue(failed)
                     self.handleError(self._last_record)
+                    return
+
+    def _requeue(self, records: List[logging.LogRecord]) -> None:
+        """Put failed records back for the next flush, dropping exhausted ones."""
+        retry = []
+        for record in records:
+            attempts = self._attempts.get(record, 0) + 1
+            if attempts <= self.max_retries:
+                self._attempts[record] = attempts
+                retry.append(record)
+        if self._buffer.maxlen is not None:
+            # Records logged since the failure take precedence over retries.
+            del retry[max(self._buffer.maxlen - len(self._buffer), 0) :]
+        self._buffer.extendleft(reversed(retry))
 
     def clear(self) -> None:
-        del self._buffer
-        self._buffer = []
+        self._buffer.clear()
 
 
 class MongoLogHandler(BatchableLogHandler):
     """Basic logging facility for MongoDB.
 
     Based on the implementation in `log4mongo <https://github.com/log4mongo/log4mongo-python/>`_.
+
+    Documents are inserted ``max_batch_size`` at a time, and at most
+    ``max_buffered`` records are held while MongoDB is slow or unreachable.
     """
 
     def __init__(
@@ -131,9 +250,24 @@ class MongoLogHandler(BatchableLogHandler):
         buffer_size: int = -1,
         buffer_timeout: float = -1,
         raise_on_error: bool = True,
+        max_retries: int = 3,
+        max_batch_size: int = 1000,
+        max_buffered: Optional[int] = 100_000,
     ) -> None:
-        super().__init__(level, buffer_size, buffer_timeout)
+        super().__init__(
+            level,
+            buffer_size,
+            buffer_timeout,
+            max_retries,
+            max_batch_size,
+            max_buffered,
+        )
+        self.raise_on_error = raise_on_error
         self._collection, self._client, self._db = self._get_connection(mongo_config)
+        self._stopping = False
+        self._wakeup = threading.Event()
+        self._writer = threading.Thread(target=self._write_batches, daemon=True)
+        self._writer.start()
 
     def _get_connection(
         self, config: MongoConfig
@@ -144,13 +278,15 @@ class MongoLogHandler(BatchableLogHandler):
             username=config.username,
             password=config.password,
             authSource=config.authentication_db,
+            w=1 if self.raise_on_error else 0,
+            compressors="zlib",
         )
         try:
             if not client.is_primary:
                 raise ValueError("Configured MongoDB server cannot accept writes")
         except ServerSelectionTimeoutError:
             if not self.raise_on_error:
-                return
+                return None, client, None
             raise
         if config.collection is None:
             raise ValueError("A logging collection must be specified")
@@ -158,12 +294,87 @@ class MongoLogHandler(BatchableLogHandler):
         collection = db[config.collection]
         return collection, client, db
 
+    def emit(self, record: logging.LogRecord) -> None:
+        self._last_record = record
+        self._buffer.append(record)
+        if self._should_flush(record):
+            self._wakeup.set()
+
+    def _write_batches(self) -> None:
+        """Insert buffered documents from a background thread.
+
+        Wakes up when ``emit`` fills the buffer, or every ``buffer_timeout``
+        seconds, so the logging call site never waits on formatting or a
+        MongoDB round trip.
+        """
+        timeout = self._buffer_timeout if self._buffer_timeout > 0 else None
+        while True:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self.flush()
+            if self._stopping:
+                break
+
     def close(self):
-        ...
+        self._stopping = True
+        self._wakeup.set()
+        self._writer.join()
+        if self._client is not None:
+            self._client.close()
+        super().close()
+
+    def format(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """Convert a LogRecord to a MongoDB document."""
+        document = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "file": record.pathname,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.thread,
+        }
+        if record.exc_info:
+            formatter = self.formatter or logging.Formatter()
+            document["exception"] = formatter.formatException(record.exc_info)
+        return document
 
     def emit_many(self, records: List[logging.LogRecord]) -> None:
-        if self._collection is not None:
-            self._collection.insert_many(self._buffer)
+        if self._collection is None:
+            return
+        # A record that cannot be formatted (e.g. bad %-args) is reported and
+        # skipped instead of failing the rest of the batch.
+        docs, formatted = [], []
+        for record in records:
+            try:
+                docs.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+                continue
+            formatted.append(record)
+        if not docs:
+            return
+        try:
+            # pymongo rejects bypass_document_validation on unacknowledged
+            # (w=0) writes, so only skip validation when writes are acked.
+            self._collection.insert_many(
+                docs,
+                ordered=False,
+                bypass_document_validation=self.raise_on_error,
+            )
+        except BulkWriteError as exc:
+            # With ordered=False everything but the reported writeErrors was
+            # inserted; only hand those back for a retry.
+            if not self.raise_on_error:
+                return
+            failed = sorted({error["index"] for error in exc.details["writeErrors"]})
+            raise BatchEmitError([formatted[i] for i in failed]) from exc
+        except PyMongoError:
+            if self.raise_on_error:
+                raise
 
 
 class AsyncLoggerFactory:
@@ -171,18 +382,32 @@ class AsyncLoggerFactory:
         ...
 
 
-def get_mp_logger(handler):
+def get_mp_logger(handler: logging.Handler) -> Tuple[QueueHandler, QueueListener]:
+    """Put a queue in front of ``handler`` so callers never block on its I/O.
+
+    Records logged through the returned QueueHandler are written by ``handler``
+    on the listener's background thread; stop the listener to flush it.
+    """
     queue = mp.Queue(-1)
     proxy_handler = QueueHandler(queue)
-    listener = QueueListener(queue)
+    listener = QueueListener(queue, handler, respect_handler_level=True)
+    listener.start()
+    return proxy_handler, listener
 
 
-SENTINEL = object()
+# Compared by identity after a round trip through the queue, so it must
+# survive pickling; QueueListener uses the same convention.
+SENTINEL = None
 _mp_log_handlers = {}
 _mp_logger = mp.log_to_stderr(level=logging.WARNING)
 
 
-def register_mp_log_handler(handler: logging.LogHandler, handler_name: str) -> None:
+def register_mp_log_handler(handler: logging.Handler, handler_name: str) -> None:
+    """Give ``handler`` its own queue and listener thread.
+
+    Each registered handler is fed by a separate queue, so a slow sink (e.g.
+    MongoDB) never holds up records bound for a fast one.
+    """
     queue = mp.Queue(-1)
 
     def listener():
@@ -191,9 +416,27 @@ def register_mp_log_handler(handler: logging.LogHandler, handler_name: str) -> N
             try:
                 if record is SENTINEL:
                     break
-                logger = logging.getLogger(record.name)
-                logger.handle(record)
+                if record.levelno >= handler.level:
+                    handler.handle(record)
             except Exception:
                 logging.getLogger().exception(
                     f"Exception in listener process for multiprocessing log handler {handler_name}"
                 )
+
+    thread = threading.Thread(target=listener, daemon=True)
+    _mp_log_handlers[handler_name] = (queue, thread, handler)
+    thread.start()
+
+
+def unregister_mp_log_handler(handler_name: str) -> None:
+    """Stop the listener for ``handler_name`` and flush and close its handler.
+
+    Records already queued are handled before the listener exits.
+    """
+    queue, thread, handler = _mp_log_handlers.pop(handler_name)
+    queue.put(SENTINEL)
+    thread.join()
+    queue.close()
+    queue.join_thread()
+    handler.flush()
+    handler.close()
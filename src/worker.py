@@ -1,11 +1,56 @@
 import multiprocessing as mp
-from abc import ABC, abstractmethod
-from typing import Any, Callable, TypeVar
+import multiprocessing.managers
+import os
+from functools import cached_property
+from queue import Empty
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple, TypeVar, Union)
 
 T = TypeVar("T")
 R = TypeVar("R")
 
 
+class _ManagerAddress:
+    """Picklable stand-in for a running manager, reconnected on unpickling.
+
+    Manager objects themselves cannot be pickled, but a child process can open
+    its own connection to the same server.
+    """
+
+    def __init__(self, manager: mp.managers.BaseManager) -> None:
+        self.manager_class = type(manager)
+        self.address = manager.address
+        # An AuthenticationString, which only pickles while spawning a process.
+        self.authkey = manager._authkey
+
+    def connect(self) -> mp.managers.BaseManager:
+        manager = self.manager_class(address=self.address, authkey=self.authkey)
+        manager.connect()
+        return manager
+
+
+def _to_picklable(obj: Any) -> Any:
+    if isinstance(obj, mp.managers.BaseManager):
+        return _ManagerAddress(obj)
+    return obj
+
+
+def _from_picklable(obj: Any) -> Any:
+    if isinstance(obj, _ManagerAddress):
+        return obj.connect()
+    return obj
+
+
+def _run_pinned(
+    worker: "QueueWorker", queue: Union[mp.Queue, mp.SimpleQueue], cpu: int
+) -> None:
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+    worker._select_proxy()
+    worker.logger  # resolve the logger proxy before the first message
+    worker.run(queue)
+
+
 class QueueWorker:
     """A generic queue-based multiprocessing worker."""
 
@@ -14,7 +59,9 @@ class QueueWorker:
         process_message: Callable[[T], R],
         func: Callable[[R], Any],
         shared: mp.managers.SharedMemoryManager,
-        proxy: mp.managers.SyncManager,
+        proxy: Union[mp.managers.SyncManager, Sequence[mp.managers.SyncManager]],
+        batch_size: int = 64,
+        batched: bool = False,
     ) -> None:
         """
         Args:
@@ -23,41 +70,203 @@ class QueueWorker:
             shared: a multiprocessing.SharedMemoryManager, in case the
                 computation needs to access shared objects
             proxy: a multiprocessing.SyncManager ("proxy factory"), used for
-                dependency injection
+                dependency injection, or a sequence of them; each worker
+                process then talks to one of them, chosen by its pid
+            batch_size: maximum number of messages taken off the queue at once
+                (a SimpleQueue is always consumed one message at a time)
+            batched: if True, process_message receives each batch as a list and
+                func is called once per batch with its result
         """
         self._process = process_message
         self._func = func
         self._shared = shared
-        self._proxy = proxy
+        if isinstance(proxy, Sequence):
+            self._proxies = tuple(proxy)
+        else:
+            self._proxies = (proxy,)
+        self._proxy = self._proxies[0]
+        self._batch_size = batch_size
+        self._batched = batched
+        self._config_cache: Dict[Tuple, Any] = {}
+
+    def _select_proxy(self) -> None:
+        """Talk to the manager picked by this process's pid.
+
+        Cached lookups came from the previous manager, so they are dropped when
+        the choice changes (e.g. in a freshly forked worker).
+        """
+        proxy = self._proxies[os.getpid() % len(self._proxies)]
+        if proxy is not self._proxy:
+            self._proxy = proxy
+            self.__dict__.pop("logger", None)
+            self._config_cache.clear()
 
-    @property
+    def __getstate__(self) -> Dict[str, Any]:
+        # Cached lookups are dropped; the child resolves its own on first use.
+        state = self.__dict__.copy()
+        state.pop("logger", None)
+        state["_config_cache"] = {}
+        state["_shared"] = _to_picklable(self._shared)
+        state["_proxies"] = tuple(_to_picklable(proxy) for proxy in self._proxies)
+        del state["_proxy"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state["_shared"] = _from_picklable(state["_shared"])
+        state["_proxies"] = tuple(_from_picklable(proxy) for proxy in state["_proxies"])
+        state["_proxy"] = state["_proxies"][0]
+        self.__dict__.update(state)
+
+    @cached_property
     def logger(self):
         return self._proxy.get_logger(__name__, self.__class__.__name__)
 
     def config(self, *keys):
-        return self._proxy.get_config(*keys)
+        """Look up a config value, asking the manager only on the first call."""
+        try:
+            return self._config_cache[keys]
+        except KeyError:
+            value = self._config_cache[keys] = self._proxy.get_config(*keys)
+            return value
+
+    def invalidate_config(self) -> None:
+        self._config_cache.clear()
+
+    def spawn_pool(
+        self,
+        n: int,
+        queue: Union[mp.Queue, mp.SimpleQueue],
+        ctx: Optional[mp.context.BaseContext] = None,
+    ) -> List[mp.Process]:
+        """Start ``n`` long-lived processes consuming ``queue``.
+
+        Where the platform supports it, each process is pinned to its own CPU
+        (round-robin over the CPUs available to this process) so the scheduler
+        does not migrate it between cores.
+
+        Under the "spawn" and "forkserver" start methods the worker is pickled
+        into each child, which reconnects to its managers; ``process_message``
+        and ``func`` must then be picklable (e.g. module-level functions).
+        """
+        ctx = ctx or mp.get_context()
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+        processes = [
+            ctx.Process(
+                target=_run_pinned, args=(self, queue, cpus[i % len(cpus)]), daemon=True
+            )
+            for i in range(n)
+        ]
+        for process in processes:
+            process.start()
+        return processes
 
     def process_message(self, msg: T) -> R:
         return self._process(msg)
 
-    def __call__(self, queue: mp.Queue):
+    def _batches(self, queue: Union[mp.Queue, mp.SimpleQueue]) -> Iterator[List[T]]:
+        # SimpleQueue has no non-blocking get, and emulating one with empty()
+        # races against the other consumers, so it yields one message at a time.
+        get_nowait = getattr(queue, "get_nowait", None)
         while True:
-            msg = queue.get_nowait()  # don't block
-            args = self.process_message(msg)
-            yield self._func(*args)
+            batch = [queue.get()]  # block until there is work
+            if get_nowait is not None:
+                try:
+                    while len(batch) < self._batch_size:
+                        batch.append(get_nowait())
+                except Empty:
+                    pass
+            yield batch
+
+    def run(
+        self,
+        queue: Union[mp.Queue, mp.SimpleQueue],
+        on_result: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """Consume ``queue`` forever, passing each result to ``on_result``.
+
+        Prefer this to iterating over ``self(queue)`` when results are not
+        needed as a stream, since it does not resume a generator per message.
+
+        Messages are taken off the queue up to ``batch_size`` at a time.  If
+        ``process_message``, ``func`` or ``on_result`` raises, the messages of
+        the batch that were not reached yet are put back on ``queue`` (at its
+        end) before the exception propagates.  In batched mode the failing
+        batch is the unit of work and is not put back.
+        """
+        self._select_proxy()
+        process, func, batched = self.process_message, self._func, self._batched
+        for batch in self._batches(queue):
+            if batched:
+                result = func(process(batch))
+                if on_result is not None:
+                    on_result(result)
+                continue
+            pending = iter(batch)
+            try:
+                for msg in pending:
+                    result = func(*process(msg))
+                    if on_result is not None:
+                        on_result(result)
+            except BaseException:
+                for msg in pending:
+                    queue.put(msg)
+                raise
+
+    def __call__(self, queue: Union[mp.Queue, mp.SimpleQueue]):
+        """Yield results as messages are consumed from ``queue``.
+
+        Unless ``batched``, one message is taken off the queue per result, so
+        an abandoned generator or an exception loses no other messages.  In
+        batched mode up to ``batch_size`` messages are taken at once and
+        produce a single result.
+        """
+        self._select_proxy()
+        process, func = self.process_message, self._func
+        if not self._batched:
+            get = queue.get
+            while True:
+                yield func(*process(get()))
+        for batch in self._batches(queue):
+            yield func(process(batch))
+
+
+class Model:
+    """Base class for a forecasting model.
+
+    Subclasses must override ``initialize``, ``update`` and ``train``; this is
+    checked when the subclass is defined rather than through ``ABCMeta``.
+    Intermediate bases can opt out with ``class Base(Model, abstract=True)``,
+    but neither they nor ``Model`` itself can be instantiated.
+    """
+
+    _abstract = True
 
+    def __init_subclass__(cls, abstract: bool = False, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._abstract = abstract
+        if abstract:
+            return
+        missing = [
+            name
+            for name in ("initialize", "update", "train")
+            if getattr(cls, name) is getattr(Model, name)
+        ]
+        if missing:
+            raise TypeError(f"{cls.__name__} must implement {', '.join(missing)}")
 
-class Model(ABC):
-    """Base class for a forecasting model."""
+    def __new__(cls, *args, **kwargs):
+        if cls._abstract:
+            raise TypeError(f"Can't instantiate abstract model {cls.__name__}")
+        return super().__new__(cls)
 
-    @abstractmethod
     def initialize(self) -> None:
-        ...
+        raise NotImplementedError
 
-    @abstractmethod
     def update(self) -> None:
-        ...
+        raise NotImplementedError
 
-    @abstractmethod
     def train(self) -> None:
-        ...
+        raise NotImplementedError
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from src import configuration
+from src.configuration import Configuration
+
+
+@pytest.fixture
+def parse_counts(monkeypatch):
+    monkeypatch.setattr(configuration, "_parsed_files", {})
+    counts = {"json": 0, "yaml": 0}
+
+    def counting(kind, parse):
+        def wrapper(f):
+            counts[kind] += 1
+            return parse(f)
+
+        return wrapper
+
+    monkeypatch.setattr(
+        configuration, "_parse_json", counting("json", configuration._parse_json)
+    )
+    monkeypatch.setattr(
+        configuration, "_parse_yaml", counting("yaml", configuration._parse_yaml)
+    )
+    return counts
+
+
+@pytest.mark.parametrize(
+    "kind, suffix, text, changed",
+    [
+        ("json", ".json", '{"a": {"b": 1}}', '{"a": {"b": 22}}'),
+        ("yaml", ".yaml", "a:\n  b: 1\n", "a:\n  b: 22\n"),
+    ],
+)
+def test_load_is_cached_until_file_changes(
+    tmp_path, parse_counts, kind, suffix, text, changed
+):
+    path = tmp_path / f"config{suffix}"
+    path.write_text(text)
+    load = getattr(Configuration(), f"load_{kind}")
+
+    first = load(path)
+    first["a"]["b"] = "mutated"
+    second = load(str(path))
+    assert second == {"a": {"b": 1}}
+    assert parse_counts[kind] == 1
+
+    path.write_text(changed)
+    assert load(path) == {"a": {"b": 22}}
+    assert parse_counts[kind] == 2
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    load(path)
+    assert parse_counts[kind] == 3
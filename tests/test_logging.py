@@ -0,0 +1,222 @@
+import logging
+import shutil
+import threading
+import time
+
+import mongomock
+import pytest
+
+from src import logging as mp_logging
+from src.configuration import MongoConfig
+from src.logging import (BatchableLogHandler, MongoLogHandler,
+                         PeriodicMemoryHandler,
+                         TimedRotatingFileHandlerWithHeader,
+                         register_mp_log_handler, unregister_mp_log_handler)
+
+
+class RecordingHandler(BatchableLogHandler):
+    def __init__(self, *args, fail_on=(), **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.batches = []
+        self.errors = []
+        self.written = []
+        self.fail_on = set(fail_on)
+
+    def emit_many(self, records):
+        self.batches.append([record.msg for record in records])
+        super().emit_many(records)
+
+    def emit_one(self, record):
+        if record.msg in self.fail_on:
+            raise IOError(record.msg)
+        self.written.append(record.msg)
+
+    def handleError(self, record):
+        self.errors.append(record)
+
+
+def make_record(msg, created=None, level=logging.INFO):
+    record = logging.makeLogRecord({"msg": msg, "levelno": level})
+    if created is not None:
+        record.created = created
+    return record
+
+
+@pytest.fixture
+def mongo_handler(monkeypatch):
+    monkeypatch.setattr(mp_logging, "MongoClient", mongomock.MongoClient)
+    handlers = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("buffer_size", 100)
+        handler = MongoLogHandler(
+            MongoConfig("test", collection="logs"), buffer_timeout=60, **kwargs
+        )
+        handlers.append(handler)
+        return handler
+
+    yield factory
+    for handler in handlers:
+        handler.close()
+
+
+def test_flush_on_size():
+    handler = RecordingHandler(buffer_size=3)
+    handler.handle(make_record("a"))
+    handler.handle(make_record("b"))
+    assert handler.batches == []
+    handler.handle(make_record("c"))
+    assert handler.batches == [["a", "b", "c"]]
+
+
+def test_flush_on_timeout():
+    handler = RecordingHandler(buffer_timeout=1)
+    start = handler._last_emitted
+    handler.handle(make_record("a", start + 0.5))
+    assert handler.batches == []
+    handler.handle(make_record("b", start + 1.5))
+    assert handler.batches == [["a", "b"]]
+
+
+def test_flush_splits_batches_and_buffer_is_bounded():
+    handler = RecordingHandler(buffer_size=100, max_batch_size=2, max_buffered=5)
+    for msg in "abcdefg":
+        handler.handle(make_record(msg))
+    handler.flush()
+    assert handler.batches == [["c", "d"], ["e", "f"], ["g"]]
+
+
+def test_mongo_close_flushes_remaining(mongo_handler):
+    handler = mongo_handler()
+    collection = handler._collection
+    for msg in "abc":
+        handler.handle(make_record(msg))
+    assert collection.count_documents({}) == 0
+    handler.close()
+    assert [doc["message"] for doc in collection.find()] == ["a", "b", "c"]
+
+
+def test_mongo_inserts_in_fixed_size_batches(mongo_handler):
+    handler = mongo_handler(max_batch_size=2)
+    sizes = []
+    insert_many = handler._collection.insert_many
+
+    def recording_insert_many(docs, **kwargs):
+        sizes.append(len(docs))
+        return insert_many(docs, **kwargs)
+
+    handler._collection.insert_many = recording_insert_many
+    for msg in "abcde":
+        handler.handle(make_record(msg))
+    handler.close()
+    assert sizes == [2, 2, 1]
+    assert handler._collection.count_documents({}) == 5
+
+
+def test_rotating_handler_recreates_deleted_log_dir(tmp_path):
+    logfile = tmp_path / "logs" / "app.log"
+    TimedRotatingFileHandlerWithHeader(str(logfile), header="h").close()
+    shutil.rmtree(logfile.parent)
+    handler = TimedRotatingFileHandlerWithHeader(str(logfile), header="h")
+    handler.handle(make_record("a"))
+    handler.close()
+    assert logfile.read_text() == "h\na\n"
+
+
+def test_periodic_memory_handler_string_level_and_double_close():
+    target = RecordingHandler()
+    handler = PeriodicMemoryHandler(
+        flushLevel="error", target=target, flush_interval=60
+    )
+    handler.handle(make_record("a"))
+    assert target.batches == []
+    handler.handle(make_record("b", level=logging.ERROR))
+    assert target.batches == [["a"], ["b"]]
+    handler.close()
+    handler.close()
+
+
+def test_periodic_memory_handler_close_under_lock_does_not_deadlock():
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            time.sleep(0.05)
+
+    handler = PeriodicMemoryHandler(target=SlowHandler(), flush_interval=0.01)
+    for msg in "abc":
+        handler.handle(make_record(msg))
+
+    def shutdown():
+        # Mirrors logging.shutdown(), which closes handlers under their lock.
+        handler.acquire()
+        try:
+            handler.flush()
+            handler.close()
+        finally:
+            handler.release()
+
+    thread = threading.Thread(target=shutdown, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_failed_records_are_retried_then_dropped():
+    handler = RecordingHandler(buffer_size=3, max_retries=2, fail_on={"b"})
+    for msg in "abc":
+        handler.handle(make_record(msg))
+    assert handler.written == ["a", "c"]
+    assert [record.msg for record in handler._buffer] == ["b"]
+    handler.flush()
+    handler.flush()
+    assert handler.batches == [["a", "b", "c"], ["b"], ["b"]]
+    assert not handler._buffer
+    assert len(handler.errors) == 3
+
+
+def test_retry_counts_are_per_handler():
+    first = RecordingHandler(buffer_size=1, max_retries=1, fail_on={"a"})
+    second = RecordingHandler(buffer_size=1, max_retries=1, fail_on={"a"})
+    record = make_record("a")
+    first.handle(record)
+    first.flush()
+    second.handle(record)
+    assert [r.msg for r in second._buffer] == ["a"]
+
+
+def test_mongo_insert_failure_requeues_only_failed(mongo_handler):
+    handler = mongo_handler(max_retries=1)
+    handler.handleError = lambda record: None
+    collection = handler._collection
+    collection.create_index("message", unique=True)
+    collection.insert_one({"message": "b"})
+    for msg in "abc":
+        handler.handle(make_record(msg))
+    handler.flush()
+    assert sorted(doc["message"] for doc in collection.find()) == ["a", "b", "c"]
+    assert [record.msg for record in handler._buffer] == ["b"]
+    handler.flush()
+    assert not handler._buffer
+    assert collection.count_documents({}) == 3
+
+
+def test_mongo_skips_records_that_fail_to_format(mongo_handler):
+    handler = mongo_handler()
+    errors = []
+    handler.handleError = errors.append
+    bad = logging.makeLogRecord({"msg": "%d", "args": ("x",)})
+    for record in (make_record("a"), bad, make_record("c")):
+        handler.handle(record)
+    handler.flush()
+    assert [doc["message"] for doc in handler._collection.find()] == ["a", "c"]
+    assert errors == [bad]
+    assert not handler._buffer
+
+
+def test_unregister_mp_log_handler_drains_and_closes():
+    target = RecordingHandler(buffer_size=10)
+    register_mp_log_handler(target, "test")
+    queue = mp_logging._mp_log_handlers["test"][0]
+    queue.put(make_record("a"))
+    unregister_mp_log_handler("test")
+    assert "test" not in mp_logging._mp_log_handlers
+    assert target.batches == [["a"]]
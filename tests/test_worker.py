@@ -0,0 +1,149 @@
+import multiprocessing as mp
+import multiprocessing.managers
+import queue
+from functools import partial
+from itertools import islice
+
+import pytest
+
+from src.worker import Model, QueueWorker
+
+
+class StubProxy:
+    def __init__(self, name):
+        self.name = name
+
+    def get_logger(self, *args):
+        return self.name
+
+    def get_config(self, *keys):
+        return (self.name, keys)
+
+
+def _get_logger(*names):
+    return ".".join(names)
+
+
+class LoggingManager(mp.managers.SyncManager):
+    pass
+
+
+LoggingManager.register(
+    "get_logger", callable=_get_logger, proxytype=mp.managers.ValueProxy
+)
+
+
+def _parse(msg):
+    return (msg,)
+
+
+def _report(results, msg):
+    results.put(msg * 2)
+
+
+def make_queue(*msgs):
+    q = queue.Queue()
+    for msg in msgs:
+        q.put(msg)
+    return q
+
+
+def drain(q):
+    msgs = []
+    while not q.empty():
+        msgs.append(q.get_nowait())
+    return msgs
+
+
+def test_queue_worker_per_message_takes_only_what_it_yields():
+    worker = QueueWorker(lambda msg: (msg, 2), lambda x, y: x * y, None, StubProxy("p"))
+    q = make_queue(*range(10))
+    assert list(islice(worker(q), 3)) == [0, 2, 4]
+    assert drain(q) == list(range(3, 10))
+
+
+def test_queue_worker_batched():
+    worker = QueueWorker(
+        lambda batch: [msg * 2 for msg in batch],
+        sum,
+        None,
+        StubProxy("p"),
+        batch_size=2,
+        batched=True,
+    )
+    q = make_queue(1, 2, 3)
+    assert list(islice(worker(q), 2)) == [6, 6]
+
+
+def test_queue_worker_run_requeues_unprocessed_messages():
+    def func(msg):
+        if msg == 2:
+            raise ValueError(msg)
+        return msg
+
+    results = []
+    worker = QueueWorker(lambda msg: (msg,), func, None, StubProxy("p"))
+    q = make_queue(1, 2, 3, 4, 5)
+    with pytest.raises(ValueError):
+        worker.run(q, on_result=results.append)
+    assert results == [1]
+    assert drain(q) == [3, 4, 5]
+
+
+def test_model_requires_overrides_unless_abstract():
+    class Base(Model, abstract=True):
+        def initialize(self):
+            pass
+
+    with pytest.raises(TypeError):
+
+        class Incomplete(Base):
+            def update(self):
+                pass
+
+    class Complete(Base):
+        def update(self):
+            pass
+
+        def train(self):
+            pass
+
+    Complete()
+    for cls in (Model, Base):
+        with pytest.raises(TypeError):
+            cls()
+
+
+def test_queue_worker_simple_queue_is_not_batched():
+    worker = QueueWorker(lambda batch: batch, list, None, StubProxy("p"), batched=True)
+    q = mp.SimpleQueue()
+    for msg in (1, 2, 3):
+        q.put(msg)
+    assert list(islice(worker(q), 3)) == [[1], [2], [3]]
+
+
+def test_select_proxy_drops_cached_lookups(monkeypatch):
+    proxies = [StubProxy("a"), StubProxy("b")]
+    worker = QueueWorker(lambda msg: (msg,), print, None, proxies)
+    assert worker.logger == "a"
+    assert worker.config("x") == ("a", ("x",))
+    monkeypatch.setattr("os.getpid", lambda: 1)
+    worker._select_proxy()
+    assert worker.logger == "b"
+    assert worker.config("x") == ("b", ("x",))
+
+
+def test_spawn_pool_reconnects_managers_in_spawned_children():
+    ctx = mp.get_context("spawn")
+    with LoggingManager(ctx=ctx) as manager:
+        results, q = ctx.Queue(), ctx.Queue()
+        worker = QueueWorker(_parse, partial(_report, results), None, manager)
+        processes = worker.spawn_pool(2, q, ctx)
+        try:
+            for msg in range(4):
+                q.put(msg)
+            assert sorted(results.get(timeout=30) for _ in range(4)) == [0, 2, 4, 6]
+        finally:
+            for process in processes:
+                process.kill()
+                process.join()